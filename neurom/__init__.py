@@ -46,7 +46,7 @@ Examples:
     >>> import numpy as np  # For mean value calculation
     >>> nrns = nm.load_neurons('some/data/directory')
     >>> for nrn in nrns:
-    ...     print 'mean section length', np.mean(nm.get('section_lengths', nrn))
+    ...     print('mean section length', np.mean(nm.get('section_lengths', nrn)))
 
     Apply a function to a selection of neurites in a neuron or population.
     This example gets the number of points in each axon in a neuron population
@@ -32,9 +32,8 @@ Python module of NeuroM to check neuronal trees.
 
 import numpy as np
 from neurom.core.dataformat import COLS
-from neurom import morphmath as mm
 from neurom.morphmath import principal_direction_extent
-from neurom._compat import range, filter
+from neurom._compat import range
 
 
 def is_monotonic(neurite, tol):
@@ -52,13 +51,12 @@ def is_monotonic(neurite, tol):
 
     for node in neurite.iter_sections():
         # check that points in section satisfy monotonicity
-        sec = node.points
-        for point_id in range(len(sec) - 1):
-            if sec[point_id + 1][COLS.R] > sec[point_id][COLS.R] + tol:
-                return False
+        radii = node.points[:, COLS.R]
+        if np.any(radii[1:] > radii[:-1] + tol):
+            return False
         # Check that section boundary points satisfy monotonicity
         if(node.parent is not None and
-           sec[0][COLS.R] > node.parent.points[-1][COLS.R] + tol):
+           radii[0] > node.parent.points[-1][COLS.R] + tol):
             return False
 
     return True
@@ -83,12 +81,76 @@ def is_flat(neurite, tol, method='tolerance'):
 
     assert method in ('tolerance', 'ratio'), "Method must be one of 'tolerance', 'ratio'"
     if method == 'ratio':
-        sorted_ext = np.sort(ext)
-        return sorted_ext[0] / sorted_ext[1] < float(tol)
+        # sorting the three extents as python floats is cheaper than np.sort.
+        # The ratio is compared without a division, which is also false when
+        # the two smallest extents are zero.
+        sorted_ext = sorted(ext.tolist())
+        return sorted_ext[0] < float(tol) * sorted_ext[1]
     else:
         return any(ext < float(tol))
 
 
+# number of downstream segments compared at once with their upstream ones
+# when looking for back-tracks, which bounds the size of the temporary arrays
+_BACK_TRACKING_BLOCK_SIZE = 64
+
+
+def _is_back_tracking_section(points, radii):
+    ''' Check if a section, given its points and radii, backtracks to a previous
+    segment. The segments are processed in blocks of downstream segments, each
+    compared at once with all the segments upstream, so that long sections only
+    need temporary arrays linear in their number of segments and can exit early.
+    '''
+    # vectors of the segments and their squared lengths
+    S = np.diff(points, axis=0)
+    S_norm2 = np.einsum('ij,ij->i', S, S)
+
+    # filter out zero length segments, i.e. the ones whose endpoints are close
+    # with the default tolerances of np.isclose, |a - b| <= atol + rtol * |b|
+    not_zero_seg = ~np.all(np.abs(S) <= 1e-8 + 1e-5 * np.abs(points[1:]), axis=1)
+    S = S[not_zero_seg]
+    S_norm2 = S_norm2[not_zero_seg]
+    seg_end = points[1:][not_zero_seg]
+
+    # maximum radius from the two endpoints of each segment
+    radii = np.maximum(radii[:-1], radii[1:])[not_zero_seg]
+
+    # centers of the segments (from the origin)
+    C = seg_end - 0.5 * S
+
+    for start in range(1, len(S), _BACK_TRACKING_BLOCK_SIZE):
+        stop = min(start + _BACK_TRACKING_BLOCK_SIZE, len(S))
+
+        # Each segment seg1 (rows) is compared with the segments seg2 (columns)
+        # that precede it in the section. The vectors from the center C of seg2
+        # to the endpoint P of seg1 are projected upon seg2.
+        CP = seg_end[start:stop, np.newaxis, :] - C[np.newaxis, :stop - 1, :]
+        prj = (np.einsum('ijk,jk->ij', CP, S[:stop - 1]) / S_norm2[:stop - 1])[:, :, np.newaxis] * \
+            S[np.newaxis, :stop - 1, :]
+
+        # seg2 comes back to seg1 if the vectors are not facing the same direction,
+        # i.e. their dot product is negative
+        not_same_verse = np.einsum('ik,jk->ij', S[start:stop], S[:stop - 1]) < 0.
+
+        # the orthogonal distance from the point at the end of seg1 to seg2 segment
+        # body is smaller than the sum of their radii (overlap)
+        overlapping = np.linalg.norm(CP - prj, axis=2) <= \
+            radii[start:stop, np.newaxis] + radii[np.newaxis, :stop - 1]
+
+        # projection lies within the length of the cylinder. Check if the distance between
+        # the center C of seg2 and the projection of the end point of seg1, P is smaller than
+        # half of the others length plus a 5% tolerance
+        within_length = np.linalg.norm(prj, axis=2) < \
+            0.55 * np.sqrt(S_norm2[np.newaxis, :stop - 1])
+
+        # only the segments upstream of seg1 are compared with it
+        if np.any(not_same_verse & overlapping & within_length &
+                  (np.arange(stop - 1)[np.newaxis, :] < np.arange(start, stop)[:, np.newaxis])):
+            return True
+
+    return False
+
+
 def is_back_tracking(neurite):
     ''' Check if a neurite process backtracks to a previous node. Back-tracking takes place
     when a daughter of a branching process goes back and either overlaps with a previous point, or
@@ -102,89 +164,11 @@ def is_back_tracking(neurite):
             1. A segment endpoint falls back and overlaps with a previous segment's point
             2. The geometry of a segment overlaps with a previous one in the section
     '''
-    def pair(segs):
-        ''' Pairs the input list into triplets'''
-        return zip(segs, segs[1:])
-
-    def coords(node):
-        ''' Returns the first three values of the tree that correspond to the x, y, z coordinates'''
-        return node[COLS.XYZ]
-
-    def max_radius(seg):
-        ''' Returns maximum radius from the two segment endpoints'''
-        return max(seg[0][COLS.R], seg[1][COLS.R])
-
-    def is_not_zero_seg(seg):
-        ''' Returns True if segment has zero length'''
-        return not np.allclose(coords(seg[0]), coords(seg[1]))
-
-    def is_in_the_same_verse(seg1, seg2):
-        ''' Checks if the vectors face the same direction. This
-        is true if their dot product is greater than zero.
-        '''
-        v1 = coords(seg2[1]) - coords(seg2[0])
-        v2 = coords(seg1[1]) - coords(seg1[0])
-        return np.dot(v1, v2) >= 0
-
-    def is_seg2_within_seg1_radius(dist, seg1, seg2):
-        ''' Checks whether the orthogonal distance from the point at the end of
-        seg1 to seg2 segment body is smaller than the sum of their radii
-        '''
-        return dist <= max_radius(seg1) + max_radius(seg2)
-
-    def is_seg1_overlapping_with_seg2(seg1, seg2):
-        '''Checks if a segment is in proximity of another one upstream'''
-        # get the coordinates of seg2 (from the origin)
-        s1 = coords(seg2[0])
-        s2 = coords(seg2[1])
-
-        # vector of the center of seg2 (from the origin)
-        C = 0.5 * (s1 + s2)
-
-        # endpoint of seg1 (from the origin)
-        P = coords(seg1[1])
-
-        # vector from the center C of seg2 to the endpoint P of seg1
-        CP = P - C
-
-        # vector of seg2
-        S1S2 = s2 - s1
-
-        # projection of CP upon seg2
-        prj = mm.vector_projection(CP, S1S2)
-
-        # check if the distance of the orthogonal complement of CP projection on S1S2
-        # (vertical distance from P to seg2) is smaller than the sum of the radii. (overlap)
-        # If not exit early, because there is no way that backtracking can feasible
-        if not is_seg2_within_seg1_radius(np.linalg.norm(CP - prj), seg1, seg2):
-            return False
-
-        # projection lies within the length of the cylinder. Check if the distance between
-        # the center C of seg2 and the projection of the end point of seg1, P is smaller than
-        # half of the others length plus a 5% tolerance
-        return np.linalg.norm(prj) < 0.55 * np.linalg.norm(S1S2)
-
-    def is_inside_cylinder(seg1, seg2):
-        ''' Checks if seg2 approximately lies within a cylindrical volume of seg1.
-        Two conditions must be satisfied:
-            1. The two segments are not facing the same direction  (seg2 comes back to seg1)
-            2. seg2 is overlaping with seg1
-        '''
-        return not is_in_the_same_verse(seg1, seg2) and is_seg1_overlapping_with_seg2(seg1, seg2)
-
-    # filter out single segment sections
-    section_itr = (snode for snode in neurite.iter_sections() if snode.points.shape[0] > 2)
-    for snode in section_itr:
-        # group each section's points intro triplets
-        segment_pairs = list(filter(is_not_zero_seg, pair(snode.points)))
-
-        # filter out zero length segments
-        for i, seg1 in enumerate(segment_pairs[1:]):
-            # check if the end point of the segment lies within the previous
-            # ones in the current sectionmake
-            for seg2 in segment_pairs[0: i + 1]:
-                if is_inside_cylinder(seg1, seg2):
-                    return True
+    for snode in neurite.iter_sections():
+        # filter out single segment sections
+        if (snode.points.shape[0] > 2 and
+                _is_back_tracking_section(snode.points[:, COLS.XYZ], snode.points[:, COLS.R])):
+            return True
     return False
 
 
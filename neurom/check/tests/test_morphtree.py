@@ -186,6 +186,34 @@ def test_is_back_tracking():
     nt.assert_false(mt.is_back_tracking(t))
 
 
+def test_is_back_tracking_long_section():
+
+    # a straight section spanning several blocks of segments
+    n_points = 3 * mt._BACK_TRACKING_BLOCK_SIZE
+    points = np.zeros((n_points, 4))
+    points[:, COLS.X] = np.arange(n_points)
+    points[:, COLS.R] = 0.1
+    nt.assert_false(mt.is_back_tracking(Neurite(Section(points))))
+
+    # the last point falls back on the first segment
+    points[-1, COLS.X] = 0.5
+    nt.assert_true(mt.is_back_tracking(Neurite(Section(points))))
+
+
+def test_is_back_tracking_close_points():
+
+    # short segments far from the origin have endpoints that are close
+    # within the relative tolerance, thus they are considered of zero length
+    points = np.zeros((4, 4))
+    points[:, COLS.X] = (1000., 1000.001, 1000.002, 1000.0005)
+    points[:, COLS.R] = 0.1
+    nt.assert_false(mt.is_back_tracking(Neurite(Section(points))))
+
+    # the same section close to the origin back-tracks
+    points[:, COLS.X] -= 1000.
+    nt.assert_true(mt.is_back_tracking(Neurite(Section(points))))
+
+
 def test_get_flat_neurites():
 
     n = load_neuron(os.path.join(SWC_PATH, 'Neuron.swc'))
@@ -33,39 +33,29 @@ from neurom.core.dataformat import COLS
 
 from copy import deepcopy
 import numpy as np
-import sys
 
 
-def _n_terminations(tree):
-    '''Get the number of terminations in a tree'''
-    return sum(1 for _ in tree.ileaf())
-
-
-def _max_recursion_depth(obj):
-    ''' Estimate recursion depth, which is defined as the number of nodes in a tree
-    '''
-    neurites = obj.neurites if hasattr(obj, 'neurites') else [obj]
-
-    return max(sum(1 for _ in neu.iter_sections()) for neu in neurites)
-
-
-def _total_rectangles(tree):
+def _tree_summary(tree):
     '''
-    Calculate the total number of segments that are required
-    for the dendrogram. There is a vertical line for each segment
-    and two horizontal line at each branching point
+    Gather in a single bottom-up pass over the sections of a tree:
+        - the number of terminations below each section, in a dict
+          keyed by the id of the section
+        - an upper bound of the number of rectangles that are required
+          for the dendrogram. There is a vertical line for each segment
+          and at most a horizontal line for each child of a section
+        - the maximum diameter in the tree
     '''
-    return sum(len(sec.children) + sec.points.shape[0] - 1
-               for sec in tree.iter_sections())
+    terminations = {}
+    n_rectangles = 0
+    max_radius = 0.
 
+    for sec in tree.root_node.ipostorder():
+        terminations[id(sec)] = sum(terminations[id(child)] for child in sec.children) \
+                                if sec.children else 1
+        n_rectangles += len(sec.children) + sec.points.shape[0] - 1
+        max_radius = max(max_radius, np.max(sec.points[:, COLS.R]))
 
-def _n_rectangles(obj):
-    '''
-    Calculate the total number of rectangles with respect to
-    the type of the object
-    '''
-    return sum(_total_rectangles(neu) for neu in obj.neurites) \
-           if hasattr(obj, 'neurites') else _total_rectangles(obj)
+    return terminations, n_rectangles, 2. * max_radius
 
 
 def _square_segment(radius, origin):
@@ -77,47 +67,88 @@ def _square_segment(radius, origin):
                      (origin[0] + radius, origin[1] - radius)))
 
 
-def _vertical_segment(old_offs, new_offs, spacing, radii):
-    '''Vertices for a vertical rectangle
+def _vertical_segments(x_offset, y_offsets, spacing, radii, xs, ys):
+    '''Vertices for the vertical rectangles of a section, one per segment
+
+    Args:
+        x_offset: x position of the section
+        y_offsets: y positions of the section points, one more than the segments
+        spacing: spacing in x and y
+        radii: pair of the start and end radii of the segments, either arrays
+            of length n or scalars
+        xs, ys: (n, 4) arrays the x and y coordinates of the vertices are written into
     '''
-    return np.array(((new_offs[0] - radii[0], old_offs[1] + spacing[1]),
-                     (new_offs[0] - radii[1], new_offs[1]),
-                     (new_offs[0] + radii[1], new_offs[1]),
-                     (new_offs[0] + radii[0], old_offs[1] + spacing[1])))
+    xs[:, 0] = x_offset - radii[0]
+    xs[:, 1] = x_offset - radii[1]
+    xs[:, 2] = x_offset + radii[1]
+    xs[:, 3] = x_offset + radii[0]
+    ys[:, 0] = ys[:, 3] = y_offsets[:-1] + spacing[1]
+    ys[:, 1] = ys[:, 2] = y_offsets[1:]
 
 
-def _horizontal_segment(old_offs, new_offs, spacing, diameter):
-    '''Vertices of a horizontal rectangle
+def _horizontal_segment(old_offs, new_offs, spacing, diameter, xs, ys):
+    '''Vertices of a horizontal rectangle, written into the
+       x and y coordinate arrays xs and ys of length 4
     '''
-    return np.array(((old_offs[0], old_offs[1] + spacing[1]),
-                     (new_offs[0], old_offs[1] + spacing[1]),
-                     (new_offs[0], old_offs[1] + spacing[1] - diameter),
-                     (old_offs[0], old_offs[1] + spacing[1] - diameter)))
+    y_top = old_offs[1] + spacing[1]
+    xs[0] = xs[3] = old_offs[0]
+    xs[1] = xs[2] = new_offs[0]
+    ys[0] = ys[1] = y_top
+    ys[2] = ys[3] = y_top - diameter
 
 
-def _spacingx(node, max_dims, xoffset, xspace):
+def _spacingx(terminations, xoffset, xspace):
     '''Determine the spacing of the current node depending on the number
        of the leaves of the tree
     '''
-    x_spacing = _n_terminations(node) * xspace
-
-    if x_spacing > max_dims[0]:
-        max_dims[0] = x_spacing
+    return xoffset - terminations * xspace / 2.
 
-    return xoffset - x_spacing / 2.
 
-
-def _update_offsets(start_x, spacing, terminations, offsets, length):
+def _update_offsets(start_x, spacing, terminations, offsets, lengths):
     '''Update the offsets
+
+    Returns the x offset of a section and the y offsets of the end points
+    of its segments, given their lengths.
     '''
     return (start_x + spacing[0] * terminations / 2.,
-            offsets[1] + spacing[1] * 2. + length)
+            offsets[1] + np.cumsum(spacing[1] * 2. + lengths))
+
 
+def _vertical_rectangles(section, start_x, spacing, offsets, terminations,
+                         show_diameters, xs, ys):
+    '''Write the vertical rectangles of the segments of a section
 
-def _max_diameter(tree):
-    '''Find max diameter in tree
+    Args:
+        section: the section to draw
+        start_x: x position where the space of the section starts
+        spacing: spacing in x and y
+        offsets: x and y offsets of the start point of the section
+        terminations: number of leaves below the section
+        show_diameters: if False, the rectangles have zero width
+        xs, ys: arrays the x and y coordinates of the vertices are written
+            into, starting from their first row
+
+    Returns the offsets of the end point of the section, its length
+    and the number of rectangles that were written.
     '''
-    return 2. * max(max(node.points[:, COLS.R]) for node in tree.ipreorder())
+    segments = section.points
+
+    # segement lengths, and their sum
+    seg_lengths = np.linalg.norm(np.diff(segments[:, COLS.XYZ], axis=0), axis=1)
+
+    # start and end radii of the segments, as views on the points
+    radii = (segments[:-1, COLS.R], segments[1:, COLS.R]) if show_diameters else (0., 0.)
+
+    # offsets of the vertical segments
+    x_offset, y_offsets = _update_offsets(start_x, spacing, terminations, offsets, seg_lengths)
+    y_offsets = np.hstack((offsets[1], y_offsets))
+
+    # segments are drawn vertically, all the ones of the section at once
+    n_segments = len(seg_lengths)
+    _vertical_segments(x_offset, y_offsets, spacing, radii,
+                       xs[:n_segments], ys[:n_segments])
+
+    return (x_offset, y_offsets[-1]), seg_lengths.sum(), n_segments
 
 
 class Dendrogram(object):
@@ -133,29 +164,30 @@ class Dendrogram(object):
 
         # input object, tree, or neuron
         self._obj = deepcopy(Neurite(obj) if isinstance(obj, Tree) else obj)
-
-        # counter/index for the storage of the rectangles.
-        # it is updated recursively
-        self._n = 0
-
-        # the maximum lengths in x and y that is occupied
-        # by a neurite. It is updated recursively.
-        self._max_dims = [0., 0.]
-
-        # stores indices that refer to the _rectangles array
-        # for each neurite
-        self._groups = []
+        self._neurites = self._obj.neurites if hasattr(self._obj, 'neurites') else (self._obj,)
 
         # dims store the max dimensions for each neurite
         # essential for the displacement in the plotting
         self._dims = []
 
-        # initialize the number of rectangles
-        self._rectangles = np.zeros([_n_rectangles(self._obj), 4, 2])
-
-        # determine the maximum recursion depth for the given object
-        # which depends on the tree with the maximum number of nodes
-        self._max_rec_depth = _max_recursion_depth(self._obj)
+        # number of terminations below each section, number of rectangles
+        # and max diameter of each neurite, all computed in one pass over
+        # each neurite
+        self._terminations = {}
+        self._max_diameters = []
+
+        # the rectangles of each neurite are stored in their own buffer. The x
+        # and y coordinates of their vertices are stored in separate arrays,
+        # which are updated independently. Single precision is enough for the
+        # plotting.
+        self._trees = []
+
+        for neurite in self._neurites:
+            terminations, n_rectangles, max_diameter = _tree_summary(neurite)
+            self._terminations.update(terminations)
+            self._max_diameters.append(max_diameter)
+            self._trees.append((np.zeros((n_rectangles, 4), dtype=np.float32),
+                                np.zeros((n_rectangles, 4), dtype=np.float32)))
 
     def _generate_soma(self):
         '''soma'''
@@ -167,119 +199,101 @@ class Dendrogram(object):
         '''
         offsets = (0., 0.)
 
-        n_previous = 0
-
-        # set recursion limit with respect to
-        # the max number of nodes on the trees
-        old_depth = sys.getrecursionlimit()
-        max_depth = old_depth if old_depth > self._max_rec_depth else self._max_rec_depth
-        # TODO: This should be fixed so we don't set sys.setrecursionlimit at all
-        sys.setrecursionlimit(max_depth)
-
-        if isinstance(self._obj, Neurite):
-
-            max_diameter = _max_diameter(self._obj.root_node)
-
-            dummy_section = Tree()
-            dummy_section.add_child(self._obj.root_node)
-            self._generate_dendro(dummy_section, (max_diameter, 0.), offsets)
-
-            self._groups.append((0., self._n))
+        for i, (neurite, max_diameter) in enumerate(zip(self._neurites, self._max_diameters)):
 
-            self._dims.append(self._max_dims)
+            xs, ys = self._trees[i]
+            max_dims, n = self._generate_dendro(neurite.root_node, (max_diameter, 0.),
+                                                offsets, (xs, ys))
 
-        else:
+            # store the max dims per neurite for view positioning
+            self._dims.append(max_dims)
 
-            for neurite in self._obj.neurites:
+            # drop the rows reserved for the horizontal lines that were not
+            # written, i.e. the ones of children aligned with their parent
+            self._trees[i] = (xs[:n], ys[:n])
 
-                neurite = neurite.root_node
-                max_diameter = _max_diameter(neurite)
-                dummy_section = Tree()
+    def _generate_dendro(self, root_section, spacing, offsets, tree):
+        '''Dendrogram line computations
 
-                dummy_section.add_child(neurite)
-                self._generate_dendro(dummy_section, (max_diameter, 0.), offsets)
+        The tree is traversed depth-first with an explicit stack of
+        (sections, terminations, offsets) frames, where sections are the
+        children laid out below the offsets and terminations is the number
+        of leaves of their parent. Deep trees thus do not hit the interpreter
+        recursion limit.
 
-                # store in trees the indices for the slice which corresponds
-                # to the current neurite
-                self._groups.append((n_previous, self._n))
-
-                # store the max dims per neurite for view positioning
-                self._dims.append(self._max_dims)
-
-                # reset the max dimensions for the next tree in line
-                self._max_dims = [0., 0.]
-
-                # keep track of the next tree start index in list
-                n_previous = self._n
-
-        # set it back to its initial value
-        sys.setrecursionlimit(old_depth)
-
-    def _generate_dendro(self, current_section, spacing, offsets):
-        '''Recursive function for dendrogram line computations
+        The vertices of the rectangles are written into the pair of the x and
+        y coordinate arrays of the tree. Returns the maximum lengths in x and y that are occupied
+        by the tree and the number of rectangles that were written.
         '''
-        max_dims = self._max_dims
-        start_x = _spacingx(current_section, max_dims, offsets[0], spacing[0])
+        # the widest level of the tree is the one of its leaves,
+        # which are as many as the terminations of the root
+        max_dims = [self._terminations[id(root_section)] * spacing[0], 0.]
 
-        for child in current_section.children:
+        # counter/index for the storage of the rectangles
+        n = 0
 
-            segments = child.points
+        stack = [((root_section,), self._terminations[id(root_section)], offsets)]
 
-            # number of leaves in child
-            terminations = _n_terminations(child)
+        while stack:
 
-            # segement lengths
-            seg_lengths = np.linalg.norm(np.subtract(segments[:-1, COLS.XYZ],
-                                                     segments[1:, COLS.XYZ]), axis=1)
+            children, terminations, offsets = stack.pop()
+            start_x = _spacingx(terminations, offsets[0], spacing[0])
 
-            # segment radii
-            radii = np.vstack((segments[:-1, COLS.R], segments[1:, COLS.R])).T \
-                    if self._show_diameters else np.zeros((seg_lengths.shape[0], 2))
+            for child in children:
 
-            y_offset = offsets[1]
-            for i, slen in enumerate(seg_lengths):
+                # number of leaves in child
+                terminations = self._terminations[id(child)]
 
-                # offset update for the vertical segments
-                new_offsets = _update_offsets(start_x, spacing, terminations,
-                                              (offsets[0], y_offset), slen)
+                new_offsets, section_length, n_segments = \
+                    _vertical_rectangles(child, start_x, spacing, offsets, terminations,
+                                         self._show_diameters, tree[0][n:], tree[1][n:])
+                n += n_segments
 
-                # segments are drawn vertically, thus only y_offset changes from init offsets
-                self._rectangles[self._n] = _vertical_segment((offsets[0], y_offset),
-                                                              new_offsets, spacing, radii[i, :])
-                self._n += 1
-                y_offset = new_offsets[1]
+                if new_offsets[1] + spacing[1] * 2 + section_length > max_dims[1]:
+                    max_dims[1] = new_offsets[1] + spacing[1] * 2. + section_length
 
-            if y_offset + spacing[1] * 2 + sum(seg_lengths) > max_dims[1]:
-                max_dims[1] = y_offset + spacing[1] * 2. + sum(seg_lengths)
+                # the child's children are laid out below its end point
+                stack.append((child.children, terminations, new_offsets))
 
-            self._max_dims = max_dims
-            # recursive call to self.
-            self._generate_dendro(child, spacing, new_offsets)
+                # update the starting position for the next child
+                start_x += terminations * spacing[0]
 
-            # update the starting position for the next child
-            start_x += terminations * spacing[0]
+                # write the horizontal lines only for bifurcations, where the are actual
+                # horizontal lines and not zero ones
+                if offsets[0] != new_offsets[0]:
 
-            # write the horizontal lines only for bifurcations, where the are actual horizontal
-            # lines and not zero ones
-            if offsets[0] != new_offsets[0]:
+                    # horizontal segment. Thickness is either 0 if show_diameters is false
+                    # or 1. if show_diameters is true
+                    _horizontal_segment(offsets, new_offsets, spacing, 0.,
+                                        tree[0][n], tree[1][n])
+                    n += 1
 
-                # horizontal segment. Thickness is either 0 if show_diameters is false
-                # or 1. if show_diameters is true
-                self._rectangles[self._n] = _horizontal_segment(offsets, new_offsets, spacing, 0.)
-                self._n += 1
+        return max_dims, n
+
+    @property
+    def trees(self):
+        ''' Returns the list of the (n, 4, 2) arrays with the rectangle
+            collection of each neurite
+        '''
+        return [np.dstack((xs, ys)) for xs, ys in self._trees]
 
     @property
     def data(self):
-        ''' Returns the array with the rectangle collection
+        ''' Returns the (N, 4, 2) array with the rectangle collection
         '''
-        return self._rectangles
+        return np.concatenate(self.trees)
 
     @property
     def groups(self):
         ''' Returns the list of the indices for the slicing of the
             rectangle array wich correspond to each neurite
         '''
-        return self._groups
+        groups = []
+        n_previous = 0
+        for xs, _ in self._trees:
+            groups.append((n_previous, n_previous + len(xs)))
+            n_previous += len(xs)
+        return groups
 
     @property
     def dims(self):
@@ -292,8 +306,7 @@ class Dendrogram(object):
         ''' Returns an iterator over the types of the neurites in the object.
             If the object is a tree, then one value is returned.
         '''
-        neurites = self._obj.neurites if hasattr(self._obj, 'neurites') else (self._obj,)
-        return (neu.type for neu in neurites)
+        return (neu.type for neu in self._neurites)
 
     @property
     def soma(self):
@@ -2,8 +2,10 @@ import os
 import numpy as np
 from nose import tools as nt
 from neurom.core.types import NeuriteType
+from neurom.core.dataformat import COLS
 import neurom.view._dendrogram as dm
 from neurom import load_neuron, get
+from neurom.core import Neurite, Section
 
 _PWD = os.path.dirname(os.path.abspath(__file__))
 DATA_PATH = os.path.join(_PWD, '../../../test_data/h5/v1/Neuron.h5')
@@ -17,26 +19,73 @@ SPACING = (40., 0.)
 
 def test_n_rectangles_tree():
 
-    nt.assert_equal(dm._n_rectangles(NEURITE), 230)
+    nt.assert_equal(dm._tree_summary(NEURITE)[1], 230)
 
 
 def test_n_rectangles_neuron():
 
-    nt.assert_equal(dm._n_rectangles(NEURON), 920)
+    nt.assert_equal(sum(dm._tree_summary(neu)[1] for neu in NEURON.neurites), 920)
 
 
-def test_vertical_segment():
+def _make_trifurcation():
+    '''A root section followed by a unifurcation and a trifurcation'''
+    def _section(y0, y1):
+        points = np.zeros((2, 4))
+        points[:, COLS.Y] = (y0, y1)
+        points[:, COLS.R] = 0.5
+        return Section(points)
 
-    radii = [10., 20.]
+    root = Section(np.array([[0., 0., 0., 0.5], [0., 1., 0., 0.5], [0., 2., 0., 0.5]]))
+    unifurcation = _section(2., 3.)
+    root.add_child(unifurcation)
+    for _ in range(3):
+        unifurcation.add_child(_section(3., 4.))
+    return Neurite(root)
 
-    res = np.array([[ -7.7,  -1.2],
-                    [-17.7,  -2.3],
-                    [ 22.3,  -2.3],
-                    [ 12.3,  -1.2]])
 
-    seg = dm._vertical_segment(OLD_OFFS, NEW_OFFS, SPACING, radii)
+def test_n_terminations():
 
-    nt.assert_true(np.allclose(seg, res))
+    terminations = dm._tree_summary(NEURITE)[0]
+
+    nt.assert_equal(len(terminations), sum(1 for _ in NEURITE.iter_sections()))
+
+    for sec in NEURITE.iter_sections():
+        nt.assert_equal(terminations[id(sec)], sum(1 for _ in sec.ileaf()))
+
+
+def test_max_diameter():
+
+    max_diameter = dm._tree_summary(NEURITE)[2]
+
+    nt.assert_almost_equal(max_diameter, 2. * np.max(NEURITE.points[:, COLS.R]))
+
+
+def test_vertical_segments():
+
+    radii = (np.array([10., 20.]), np.array([20., 5.]))
+
+    y_offsets = np.array([OLD_OFFS[1], NEW_OFFS[1], -4.])
+
+    res = np.array([[[ -7.7,  -1.2],
+                     [-17.7,  -2.3],
+                     [ 22.3,  -2.3],
+                     [ 12.3,  -1.2]],
+                    [[-17.7,  -2.3],
+                     [ -2.7,  -4. ],
+                     [  7.3,  -4. ],
+                     [ 22.3,  -2.3]]])
+
+    xs, ys = np.zeros((2, 4)), np.zeros((2, 4))
+    dm._vertical_segments(NEW_OFFS[0], y_offsets, SPACING, radii, xs, ys)
+    segs = np.dstack((xs, ys))
+
+    nt.assert_true(np.allclose(segs, res))
+
+    # without diameters
+    dm._vertical_segments(NEW_OFFS[0], y_offsets, SPACING, (0., 0.), xs, ys)
+
+    nt.assert_true(np.allclose(xs, NEW_OFFS[0]))
+    nt.assert_true(np.allclose(ys, res[:, :, 1]))
 
 
 def test_horizontal_segment():
@@ -48,7 +97,9 @@ def test_horizontal_segment():
                     [  2.3, -11.2],
                     [  1.2, -11.2]])
 
-    seg = dm._horizontal_segment(OLD_OFFS, NEW_OFFS, SPACING, diameter)
+    xs, ys = np.zeros(4), np.zeros(4)
+    dm._horizontal_segment(OLD_OFFS, NEW_OFFS, SPACING, diameter, xs, ys)
+    seg = np.column_stack((xs, ys))
 
     nt.assert_true(np.allclose(seg, res))
 
@@ -57,23 +108,21 @@ def test_spacingx():
 
     xoffset = 100.
     xspace = 40.
-    max_dims = [10., 2.]
 
-    spx = dm._spacingx(TREE, max_dims, xoffset, xspace)
+    spx = dm._spacingx(11, xoffset, xspace)
 
     nt.assert_almost_equal(spx, -120.)
-    nt.assert_almost_equal(max_dims[0], 440.)
 
 
 def test_update_offsets():
 
     start_x = -10.
-    length = 44.
+    lengths = np.array([44., 3.])
 
-    offs = dm._update_offsets(start_x, SPACING, 2, OLD_OFFS, length)
+    offs = dm._update_offsets(start_x, SPACING, 2, OLD_OFFS, lengths)
 
     nt.assert_almost_equal(offs[0], 30.)
-    nt.assert_almost_equal(offs[1], 42.8)
+    nt.assert_true(np.allclose(offs[1], (42.8, 45.8)))
 
 class TestDendrogram(object):
 
@@ -87,12 +136,27 @@ class TestDendrogram(object):
 
     def test_init(self):
 
-        nt.assert_true(np.allclose(self.dnrn._rectangles.shape, (920, 4, 2)))
+        nt.assert_true(np.allclose(self.dnrn.data.shape, (920, 4, 2)))
+        nt.assert_equal(len(self.dnrn._trees), 4)
 
     def test_generate_tree(self):
 
-        nt.assert_true(np.allclose(self.dtr._rectangles.shape, (230, 4, 2)))
-        nt.assert_false(np.all(self.dtr._rectangles == 0.))
+        nt.assert_true(np.allclose(self.dtr.data.shape, (230, 4, 2)))
+        nt.assert_false(np.all(self.dtr.data == 0.))
+
+    def test_generate_trifurcation(self):
+
+        # the horizontal lines of the unifurcation and of the middle child
+        # of the trifurcation would be of zero length and are not written
+        neurite = _make_trifurcation()
+        nt.assert_equal(dm._tree_summary(neurite)[1], 10)
+
+        dnd = dm.Dendrogram(neurite)
+        dnd.generate()
+
+        nt.assert_equal(dnd.data.shape, (8, 4, 2))
+        nt.assert_equal(dnd.groups, [(0, 8)])
+        nt.assert_false(np.any(np.all(dnd.data == 0., axis=(1, 2))))
 
     def test_generate_soma(self):
 
@@ -116,13 +180,12 @@ class TestDendrogram(object):
 
         total = 0
 
-        for n0, n1 in self.dnrn._groups:
-
-            group = self.dnrn._rectangles[n0: n1]
+        for group, (n0, n1) in zip(self.dnrn.trees, self.dnrn.groups):
 
             total += group.shape[0]
 
             nt.assert_false(np.all(group == 0.))
+            nt.assert_true(np.all(group == self.dnrn.data[n0: n1]))
 
         nt.assert_equal(total, 920)
 
@@ -131,6 +194,11 @@ class TestDendrogram(object):
         nt.assert_false(np.all(self.dnrn.data == 0.))
         nt.assert_false(np.all(self.dtr.data == 0.))
 
+    def test_trees(self):
+
+        nt.assert_equal(len(self.dnrn.trees), len(NEURON.neurites))
+        nt.assert_equal(len(self.dtr.trees), 1)
+
     def test_groups(self):
 
         nt.assert_false(not self.dnrn.groups)
@@ -141,10 +209,13 @@ class TestDendrogram(object):
         nt.assert_false(not self.dnrn.dims)
         nt.assert_false(not self.dtr.dims)
 
+        # the x extent of a neurite is the space taken by its leaves
+        max_diameter = dm._tree_summary(NEURITE)[2]
+        nt.assert_almost_equal(self.dtr.dims[0][0], 11 * max_diameter)
+
     def test_types_tree(self):
 
         for ctype in self.dtr.types:
-            print(ctype)
             nt.assert_true(ctype == NeuriteType.apical_dendrite)
 
     def test_types_neuron(self):
@@ -122,6 +122,21 @@ def test_dendrogram():
     fig, ax = view.dendrogram(fst_neuron)
     nt.ok_(np.allclose(ax.get_xlim(), (-11.46075159339, 80.591751611909999)))
 
+    # the rectangles of all the neurites and the soma are in a single collection
+    dnd = view.Dendrogram(fst_neuron)
+    dnd.generate()
+    nt.eq_(len(ax.collections), 1)
+    paths = ax.collections[0].get_paths()
+    nt.eq_(len(paths), len(dnd.data) + 1)
+
+    # none of them is degenerate to a point
+    nt.ok_(all(np.ptp(path.vertices, axis=0).any() for path in paths))
+
+    # the legend entries are not plotted, only the two soma lines are
+    nt.eq_(len(ax.lines), 2)
+    nt.eq_(set(t.get_text() for t in ax.get_legend().get_texts()),
+           set(['Apical dendrite', 'Basal dendrite', 'Axon', 'Soma']))
+
 
 def test_one_point_branch():
     test_section = Section(points=np.array([[1., 1., 1., 0.5, 2, 1, 0]]))
@@ -39,7 +39,7 @@ from neurom.core import Section, Neurite
 from neurom.io import COLS
 from neurom.morphmath import segment_radius
 from neurom.view._dendrogram import Dendrogram
-from neurom._compat import zip
+from neurom._compat import range, zip
 
 
 DEFAULT_PARAMS = '''        new_fig: boolean \
@@ -475,58 +475,75 @@ def _format_str(string):
     return string.replace('NeuriteType.', '').replace('_', ' ').capitalize()
 
 
-def _generate_collection(group, ax, ctype, colors):
-    ''' Render rectangle collection
+def _generate_collection(rectangles, ax, ctypes, sizes):
+    ''' Render rectangle collection, where consecutive groups of
+        rectangles with the given sizes have the colors of ctypes
     '''
     from matplotlib.collections import PolyCollection
+    from matplotlib.colors import colorConverter
+    from matplotlib.lines import Line2D
 
-    color = common.TREE_COLOR[ctype]
+    colors = [common.TREE_COLOR[ctype] for ctype in ctypes]
 
-    # generate segment collection
-    collection = PolyCollection(group, closed=False, antialiaseds=True,
-                                edgecolors='face', facecolors=color)
+    # one face color per rectangle
+    facecolors = np.repeat(colorConverter.to_rgba_array(colors), sizes, axis=0)
 
-    # add it to the axes
+    # generate a single segment collection
+    collection = PolyCollection(rectangles, closed=False, antialiaseds=True,
+                                edgecolors='face', facecolors=facecolors)
+
+    # add it to the axes and rescale the view to its limits
     ax.add_collection(collection)
+    ax.autoscale_view()
+
+    # proxy artists for the legend, one per unique color. They are not
+    # added to the axes, thus do not take part in the autoscaling
+    legend_handles = []
+    unique_colors = set()
+    for color, ctype in zip(colors, ctypes):
+        if color not in unique_colors:
+            legend_handles.append(Line2D((), (), color=color, label=_format_str(str(ctype))))
+            unique_colors.add(color)
 
-    # dummy plot for the legend
-    if color not in colors:
-        ax.plot((0., 0.), (0., 0.), c=color, label=_format_str(str(ctype)))
-        colors.add(color)
+    return legend_handles
 
 
 def _render_dendrogram(dnd, ax, displacement):
     '''Renders dendrogram
-    '''
-    # set of unique colors that reflect the set of types of the neurites
-    colors = set()
-
-    for n, (indices, ctype) in enumerate(zip(dnd.groups, dnd.types)):
 
-        # slice rectangles array for the current neurite
-        group = dnd.data[indices[0]: indices[1]]
-
-        if n > 0:
-            # displace the neurites by half of their maximum x dimension
-            # plus half of the previous neurite's maxmimum x dimension
-            displacement += 0.5 * (dnd.dims[n - 1][0] + dnd.dims[n][0])
+    Returns the total displacement of the neurites and the legend handles
+    '''
+    # rectangles of all the neurites, which are a copy of the dendrogram data
+    rectangles = dnd.data
+    sizes = [n1 - n0 for n0, n1 in dnd.groups]
+    ctypes = list(dnd.types)
 
-        # arrange the trees without overlapping with each other
-        group += (displacement, 0.)
+    displacements = [displacement]
+    for n in range(1, len(sizes)):
+        # displace the neurites by half of their maximum x dimension
+        # plus half of the previous neurite's maxmimum x dimension
+        displacement += 0.5 * (dnd.dims[n - 1][0] + dnd.dims[n][0])
+        displacements.append(displacement)
 
-        # create the polygonal collection of the dendrogram
-        # segments
-        _generate_collection(group, ax, ctype, colors)
+    # arrange the trees without overlapping with each other
+    rectangles[:, :, 0] += np.repeat(displacements, sizes)[:, np.newaxis]
 
     soma_square = dnd.soma
 
     if soma_square is not None:
 
-        _generate_collection((soma_square + (displacement / 2., 0.),), ax, NeuriteType.soma, colors)
+        rectangles = np.concatenate((rectangles, [soma_square + (displacement / 2., 0.)]))
+        ctypes.append(NeuriteType.soma)
+        sizes.append(1)
+
         ax.plot((displacement / 2., displacement), (0., 0.), color='k')
         ax.plot((0., displacement / 2.), (0., 0.), color='k')
 
-    return displacement
+    # create the polygonal collection of the dendrogram
+    # segments of all the neurites at once
+    legend_handles = _generate_collection(rectangles, ax, ctypes, sizes)
+
+    return displacement, legend_handles
 
 
 def dendrogram(obj, show_diameters=True, new_fig=True, new_axes=True, subplot=False, **kwargs):
@@ -565,7 +582,7 @@ def dendrogram(obj, show_diameters=True, new_fig=True, new_axes=True, subplot=Fa
     # starts as zero. It is important to avoid overlapping of neurites
     # and to determine tha limits of the figure.
 
-    displacement = _render_dendrogram(dnd, ax, 0.)
+    displacement, legend_handles = _render_dendrogram(dnd, ax, 0.)
 
     # customization settings
     kwargs['xlim'] = [- dnd.dims[0][0] * 0.5, dnd.dims[-1][0] * 0.5 + displacement]
@@ -574,6 +591,8 @@ def dendrogram(obj, show_diameters=True, new_fig=True, new_axes=True, subplot=Fa
     kwargs['xlabel'] = kwargs.get('xlabel', 'micrometers (um)')
     kwargs['ylabel'] = kwargs.get('ylabel', 'micrometers (um)')
     kwargs['no_legend'] = False
+    kwargs['legendarg'] = dict(kwargs.get('legendarg') or {})
+    kwargs['legendarg'].setdefault('handles', legend_handles)
     kwargs['aspect_ratio'] = kwargs.get('aspect_ratio', 'auto')
 
     return common.plot_style(fig=fig, ax=ax, **kwargs)